@@ -1,9 +1,12 @@
 # main.py
+import logging
 import sys
 from PySide6.QtWidgets import QApplication
 from printer_manager import PrinterManager
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO,
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
     app = QApplication(sys.argv)
     manager = PrinterManager()
     manager.show()
@@ -0,0 +1,169 @@
+# print_history.py
+from PySide6.QtCore import (Qt, QAbstractTableModel, QModelIndex, QObject, QRect,
+                            QRunnable, QEvent, Signal)
+from PySide6.QtWidgets import (QApplication, QStyle, QStyledItemDelegate,
+                               QStyleOptionButton)
+
+from print_logger import read_print_log, LOG_HEADER
+
+ACTION_COLUMN_TITLE = "操作"
+
+# History cells are never editable; combined once instead of on every flags() call.
+_READ_ONLY_FLAGS = Qt.ItemIsSelectable | Qt.ItemIsEnabled
+
+
+class PrintHistoryModel(QAbstractTableModel):
+    """Table model over the print log records, newest first.
+
+    The last column is the action column; its cells carry no data and are
+    drawn by HistoryActionDelegate.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.headers = LOG_HEADER + [ACTION_COLUMN_TITLE]
+        self.action_column = len(LOG_HEADER)
+        self._records = []
+        self._sort_column = None
+        self._sort_order = Qt.AscendingOrder
+
+    def set_records(self, records: list):
+        """Replaces all rows with records (oldest first, as read from the log)."""
+        self.beginResetModel()
+        self._records = list(reversed(records))
+        if self._sort_column is not None:
+            self._sort_records()
+        self.endResetModel()
+
+    def add_records(self, records: list):
+        """Adds newly logged records (oldest first) without rebuilding the table."""
+        if not records:
+            return
+        if self._sort_column is not None:
+            self.beginResetModel()
+            self._records[0:0] = reversed(records)
+            self._sort_records()
+            self.endResetModel()
+            return
+        self.beginInsertRows(QModelIndex(), 0, len(records) - 1)
+        self._records[0:0] = reversed(records)
+        self.endInsertRows()
+
+    def remove_timestamp(self, timestamp: str):
+        """Removes every row logged with timestamp."""
+        for row in range(len(self._records) - 1, -1, -1):
+            if self._records[row][0] == timestamp:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._records[row]
+                self.endRemoveRows()
+
+    def record(self, row: int) -> list:
+        return self._records[row]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._records)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        if index.column() == self.action_column:
+            return None
+        record = self._records[index.row()]
+        return record[index.column()] if index.column() < len(record) else ""
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index):
+        return _READ_ONLY_FLAGS
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if column == self.action_column:
+            return
+        self._sort_column = column
+        self._sort_order = order
+        self.layoutAboutToBeChanged.emit()
+        self._sort_records()
+        self.layoutChanged.emit()
+
+    def _sort_records(self):
+        column = self._sort_column
+        self._records.sort(key=lambda r: r[column] if column < len(r) else "",
+                           reverse=self._sort_order == Qt.DescendingOrder)
+
+
+class HistoryActionDelegate(QStyledItemDelegate):
+    """Paints the 重打/删除 buttons in the action column.
+
+    The buttons are only drawn, never instantiated as widgets, so the cost of
+    the action column does not grow with the size of the log.
+    """
+
+    reprint_requested = Signal(int)
+    delete_requested = Signal(int)
+
+    BUTTON_TEXTS = ("重打", "删除")
+    MARGIN = 5
+    SPACING = 5
+
+    def _button_rects(self, rect: QRect) -> list:
+        width = (rect.width() - 2 * self.MARGIN - self.SPACING) // 2
+        left = rect.left() + self.MARGIN
+        top, height = rect.top() + 1, rect.height() - 2
+        return [QRect(left, top, width, height),
+                QRect(left + width + self.SPACING, top, width, height)]
+
+    def paint(self, painter, option, index):
+        widget = option.widget
+        style = widget.style() if widget else QApplication.style()
+        for text, rect in zip(self.BUTTON_TEXTS, self._button_rects(option.rect)):
+            button = QStyleOptionButton()
+            button.rect = rect
+            button.text = text
+            button.state = QStyle.State_Enabled | QStyle.State_Raised
+            style.drawControl(QStyle.CE_PushButton, button, painter, widget)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            reprint_rect, delete_rect = self._button_rects(option.rect)
+            pos = event.position().toPoint()
+            if reprint_rect.contains(pos):
+                self.reprint_requested.emit(index.row())
+                return True
+            if delete_rect.contains(pos):
+                self.delete_requested.emit(index.row())
+                return True
+        return super().editorEvent(event, model, option, index)
+
+
+class _HistoryLoaderSignals(QObject):
+    # generation, records (None on failure), error message
+    loaded = Signal(int, object, object)
+
+
+class HistoryLoader(QRunnable):
+    """Reads the print log on a QThreadPool thread and emits the records.
+
+    The generation number is passed back untouched so the receiver can drop
+    results from loads that were superseded while they ran. Every load emits
+    exactly once; a log that cannot be parsed (e.g. re-saved as GBK by Excel)
+    is reported through the error message instead of escaping the thread.
+    """
+
+    def __init__(self, generation: int):
+        super().__init__()
+        self.generation = generation
+        self.signals = _HistoryLoaderSignals()
+
+    def run(self):
+        try:
+            records = read_print_log()
+        except Exception as e:
+            self.signals.loaded.emit(self.generation, None, str(e))
+            return
+        self.signals.loaded.emit(self.generation, records, None)
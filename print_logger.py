@@ -1,10 +1,72 @@
+import atexit
 import csv
+import io
+import mmap
 import os
+import re
+import threading
+import time
 from datetime import datetime
 
+try:
+    import pandas as pd
+except ImportError: # pandas is optional; the csv module is used without it
+    pd = None
+
 LOG_FILE_NAME = "print_log.csv"
 LOG_HEADER = ["Timestamp", "SKU/Filename", "Quantity", "Printer", "Status"]
 
+# Rows are appended through one long-lived file handle and written out in
+# batches: when this many rows are pending, at the latest this long after
+# the first pending row was buffered (by a timer thread), before the log is
+# read or rewritten, and at exit.
+LOG_FLUSH_ROWS = 32
+LOG_FLUSH_INTERVAL = 0.5  # seconds
+
+_log_lock = threading.RLock()
+_log_fh = None
+_log_buf: list[tuple[str, bytes]] = []  # (timestamp, encoded CSV line)
+_last_flush = 0.0
+_flush_timer: threading.Timer | None = None
+_atexit_registered = False
+# Whether print_log.csv already starts with LOG_HEADER; None until first checked.
+_header_written = None
+
+# Deleting a record overwrites the first byte of its line with this marker
+# instead of rewriting the file; readers skip marked lines. The file is
+# compacted once enough dead lines have piled up, and at exit whenever it
+# holds any. Dead lines left by earlier runs are counted when the offset
+# index is built.
+TOMBSTONE = "#"
+COMPACT_AFTER_DELETES = 200
+_tombstone_count = 0
+
+# Timestamp -> byte offsets of the lines carrying it, so a delete can seek
+# straight to its rows. Built by one scan on first use (None until then) and
+# kept up to date as rows are appended.
+_offset_index: dict[str, list[int]] | None = None
+
+# Logs at least this large are parsed with pandas' C reader when pandas is
+# installed; below it the csv module is faster than building a DataFrame.
+PANDAS_MIN_LOG_BYTES = 1024 * 1024
+_WHITESPACE_LINE = re.compile(r'^[ \t]+\r?$', re.MULTILINE)
+
+# Last result of read_print_log as (path, st_mtime_ns, st_size, records).
+# Reused while the file is unchanged; every writer in this module clears it,
+# except appends made by flush_print_log to the exact file state it describes,
+# which only mark it extendable: the next read then parses just the new tail.
+_log_cache = None
+_log_cache_extendable = False
+
+# (st_mtime_ns, st_size) of the log right after this module last wrote it,
+# so file-change notifications caused by our own writes can be told apart
+# from edits made by other programs; see log_changed_externally.
+_own_write_state = None
+
+# Callables invoked with the new rows (lists of strings, as read_print_log
+# returns them) whenever records are logged; see add_log_listener.
+_log_listeners = []
+
 def get_log_file_path() -> str:
     """Returns the absolute path to the log file."""
     # For now, place it in the same directory as this script.
@@ -21,103 +83,412 @@ def log_print_job(timestamp: str, sku_or_filename: str, quantity: int, printer_n
         printer_name: The name of the printer used.
         status: The status of the print job (e.g., "Printed", "Failed").
     """
-    log_file = get_log_file_path()
-    file_exists = os.path.isfile(log_file)
+    log_print_jobs([(timestamp, sku_or_filename, quantity, printer_name, status)])
+
+def log_print_jobs(rows: list[tuple]):
+    """Appends several print job records to the CSV log file in one write.
 
+    Rows are buffered in memory and written in batches; anything still pending
+    is written within LOG_FLUSH_INTERVAL, before the log is read or modified,
+    and when the program exits.
+
+    Args:
+        rows: Records in LOG_HEADER order, i.e.
+            (timestamp, sku_or_filename, quantity, printer_name, status).
+    """
+    if not rows:
+        return
+    text = io.StringIO()
+    writer = csv.writer(text)
+    lines = []
+    for row in rows:
+        writer.writerow(row)
+        lines.append((str(row[0]), text.getvalue().encode('utf-8')))
+        text.seek(0)
+        text.truncate()
+
+    global _flush_timer
+    with _log_lock:
+        _log_buf.extend(lines)
+        if (len(_log_buf) >= LOG_FLUSH_ROWS
+                or time.monotonic() - _last_flush > LOG_FLUSH_INTERVAL):
+            flush_print_log()
+        elif _flush_timer is None:
+            # Nothing else may come along to flush these rows, so make sure
+            # they reach the disk within LOG_FLUSH_INTERVAL regardless.
+            _flush_timer = threading.Timer(LOG_FLUSH_INTERVAL, flush_print_log)
+            _flush_timer.daemon = True
+            _flush_timer.start()
+
+    if _log_listeners:
+        new_records = [[str(value) for value in row] for row in rows]
+        for listener in list(_log_listeners):
+            listener(new_records)
+
+def add_log_listener(callback):
+    """Registers callback(records) to be called with every batch of newly logged rows.
+
+    Listeners run on the thread that logged the rows, which lets a view append
+    them without re-reading the log file.
+    """
+    _log_listeners.append(callback)
+
+def remove_log_listener(callback):
+    """Unregisters a callback added with add_log_listener."""
+    if callback in _log_listeners:
+        _log_listeners.remove(callback)
+
+def log_changed_externally() -> bool:
+    """Whether the log file differs from how this module last left it."""
+    with _log_lock:
+        try:
+            st = os.stat(get_log_file_path())
+        except FileNotFoundError:
+            return _own_write_state is not None
+        return (st.st_mtime_ns, st.st_size) != _own_write_state
+
+def _note_own_write():
+    global _own_write_state
     try:
-        with open(log_file, 'a', newline='', encoding='utf-8') as csvfile:
-            writer = csv.writer(csvfile)
-            if not file_exists or os.path.getsize(log_file) == 0:
-                writer.writerow(LOG_HEADER)
-            writer.writerow([timestamp, sku_or_filename, quantity, printer_name, status])
-    except IOError as e:
-        print(f"Error writing to log file {log_file}: {e}")
+        st = os.stat(get_log_file_path())
+        _own_write_state = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        _own_write_state = None
+
+def _get_log_fh():
+    """Returns the shared append handle, opening it (and writing the header) on first use."""
+    global _log_fh, _header_written
+    if _log_fh is None:
+        log_file = get_log_file_path()
+        if _header_written is None:
+            try:
+                _header_written = os.stat(log_file).st_size > 0
+            except FileNotFoundError:
+                _header_written = False
+        _log_fh = open(log_file, 'ab')
+        if not _header_written:
+            text = io.StringIO()
+            csv.writer(text).writerow(LOG_HEADER)
+            _log_fh.write(text.getvalue().encode('utf-8'))
+            _header_written = True
+        _register_atexit()
+    return _log_fh
+
+def _register_atexit():
+    global _atexit_registered
+    if not _atexit_registered:
+        atexit.register(_close_log_at_exit)
+        _atexit_registered = True
+
+def _close_log_at_exit():
+    """Compacts away tombstoned rows (so they do not linger in the CSV) and closes the log."""
+    if _tombstone_count:
+        compact_print_log()
+    else:
+        _close_log_fh()
+
+def flush_print_log():
+    """Writes any buffered log rows to disk."""
+    global _last_flush, _flush_timer
+    with _log_lock:
+        _last_flush = time.monotonic()
+        if _flush_timer is not None:
+            _flush_timer.cancel()
+            _flush_timer = None
+        if not _log_buf:
+            return
+        try:
+            fh = _get_log_fh()
+            if _offset_index is not None:
+                offset = fh.tell()
+                for timestamp, line in _log_buf:
+                    _offset_index.setdefault(timestamp, []).append(offset)
+                    offset += len(line)
+            extendable = _log_cache_matches(fh)
+            fh.write(b"".join(line for _, line in _log_buf))
+            fh.flush()
+            _note_own_write()
+            if extendable:
+                _mark_log_cache_extendable()
+            else:
+                _invalidate_log_cache()
+        except IOError as e:
+            print(f"Error writing to log file {get_log_file_path()}: {e}")
+            _reset_offset_index()
+        _log_buf.clear()
+
+def _reset_offset_index():
+    global _offset_index
+    _offset_index = None
+
+def _invalidate_log_cache():
+    global _log_cache, _log_cache_extendable
+    _log_cache = None
+    _log_cache_extendable = False
+
+def _mark_log_cache_extendable():
+    global _log_cache_extendable
+    _log_cache_extendable = True
+
+def _log_cache_matches(fh) -> bool:
+    """Whether the read cache still describes the file behind fh byte for byte."""
+    if _log_cache is None or _log_cache[0] != get_log_file_path():
+        return False
+    st = os.fstat(fh.fileno())
+    if _log_cache_extendable:
+        # Earlier appends already went past the cached size; the tail is
+        # re-read from the cached size onwards, so further appends are fine
+        # as long as nobody else has written the file since we last did.
+        return (st.st_mtime_ns, st.st_size) == _own_write_state
+    return _log_cache[1:3] == (st.st_mtime_ns, st.st_size)
+
+def _build_offset_index(f) -> tuple[dict[str, list[int]], int]:
+    """Scans an open binary log file once.
+
+    Returns:
+        A map from each live timestamp to its line offsets, and the number
+        of tombstoned lines in the file.
+    """
+    index = {}
+    dead = 0
+    marker = TOMBSTONE.encode('utf-8')
+    f.seek(0)
+    offset = len(f.readline())  # Skip header
+    for line in f:
+        if line.startswith(marker):
+            dead += 1
+        elif line.strip():
+            timestamp = line.split(b',', 1)[0].decode('utf-8', errors='replace')
+            index.setdefault(timestamp, []).append(offset)
+        offset += len(line)
+    return index, dead
+
+def _close_log_fh():
+    """Flushes pending rows and closes the shared handle (reopened on the next write)."""
+    global _log_fh
+    with _log_lock:
+        flush_print_log()
+        if _log_fh is not None:
+            try:
+                _log_fh.close()
+            except IOError as e:
+                print(f"Error closing log file {get_log_file_path()}: {e}")
+            _log_fh = None
 
 def read_print_log() -> list[list[str]]:
     """Reads all records from the print log CSV file.
 
+    The parsed result is cached until the file changes, so callers must treat
+    the returned list as read-only.
+
+    Safe to call from a worker thread (the print history tab loads it off the
+    GUI thread).
+
     Returns:
         A list of lists, where each inner list represents a row (excluding the header).
         Returns an empty list if the log file doesn't exist.
     """
+    with _log_lock:
+        return _read_print_log_locked()
+
+def _read_print_log_locked() -> list[list[str]]:
+    global _log_cache
+    flush_print_log()
     log_file = get_log_file_path()
-    if not os.path.isfile(log_file):
+    try:
+        st = os.stat(log_file)
+    except FileNotFoundError:
         return []
+    cache_key = (log_file, st.st_mtime_ns, st.st_size)
+    if _log_cache is not None and _log_cache[:3] == cache_key:
+        return _log_cache[3]
+    if (_log_cache_extendable and _log_cache[0] == log_file
+            and st.st_size > _log_cache[2]
+            and (st.st_mtime_ns, st.st_size) == _own_write_state):
+        # Only rows appended by this process changed the file since it was
+        # last parsed, so parse just those. Any other write (an external
+        # edit, or one racing our append) falls through to a full parse.
+        try:
+            records = _log_cache[3] + _read_log_tail(log_file, _log_cache[2])
+        except IOError as e:
+            print(f"Error reading from log file {log_file}: {e}")
+            return _log_cache[3]
+        _invalidate_log_cache()
+        _log_cache = (*cache_key, records)
+        return records
 
     records = []
     try:
-        with open(log_file, 'r', newline='', encoding='utf-8') as csvfile:
-            reader = csv.reader(csvfile)
-            header = next(reader, None)  # Skip header
-            if header: # Proceed only if header was read
-                for row in reader:
-                    if row: # Ensure row is not empty
-                        records.append(row)
-    except StopIteration:
-        # This can happen if the file is empty (only header or nothing)
-        pass
+        # Map the file and decode it in one go instead of reading it line by
+        # line; the mapping is released before parsing so the file can still
+        # be truncated or rewritten on Windows.
+        with open(log_file, 'rb') as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError: # Empty files cannot be mapped
+                return []
+            try:
+                text = mm[:].decode('utf-8')
+            finally:
+                mm.close()
+
+        parsed = None
+        if pd is not None and st.st_size >= PANDAS_MIN_LOG_BYTES:
+            parsed = _parse_log_with_pandas(text)
+        records = parsed if parsed is not None else _parse_log_with_csv(text)
     except IOError as e:
         print(f"Error reading from log file {log_file}: {e}")
+        return records
+    _invalidate_log_cache()
+    _log_cache = (*cache_key, records)
     return records
 
+def _read_log_tail(log_file: str, start: int) -> list[list[str]]:
+    """Parses the rows from byte offset start (a line boundary) to the end of the log."""
+    with open(log_file, 'rb') as f:
+        f.seek(start)
+        text = f.read().decode('utf-8')
+    return [row for row in csv.reader(io.StringIO(text, newline=''))
+            if row and not row[0].startswith(TOMBSTONE)]
+
+def _parse_log_with_csv(text: str) -> list[list[str]]:
+    """Parses the log text (header included) with the csv module."""
+    # Not text.splitlines(): that also splits on characters such as \u2028
+    # and drops line breaks inside quoted fields.
+    reader = csv.reader(io.StringIO(text, newline=''))
+    next(reader, None)  # Skip header
+    # Skip empty and deleted rows
+    return [row for row in reader if row and row[0][:1] != TOMBSTONE]
+
+def _parse_log_with_pandas(text: str) -> list[list[str]] | None:
+    """Parses the log text (header included) with pandas' C CSV reader.
+
+    Returns None if the rows do not all have the same number of fields, or
+    if there are whitespace-only lines. pandas would pad, reject or skip
+    those rows, while the csv module keeps them as they are, so the caller
+    falls back to _parse_log_with_csv.
+    """
+    if _WHITESPACE_LINE.search(text):
+        return None
+    try:
+        df = pd.read_csv(io.StringIO(text), header=None, skiprows=1, dtype=str,
+                         keep_default_na=False, engine='c', skip_blank_lines=True)
+    except pd.errors.EmptyDataError:  # Header only
+        return []
+    except pd.errors.ParserError:  # A row wider than the first one
+        return None
+    # pandas pads a row narrower than the first one with empty fields. Such a
+    # row is missing some of the separators that full rows have, so count
+    # them: every comma in the text is either in the header line, inside a
+    # value, or one of the (columns - 1) separators of a row.
+    header_commas = text.partition('\n')[0].count(',')
+    value_commas = sum(df[column].str.count(',').sum() for column in df.columns)
+    separators = len(df) * (len(df.columns) - 1)
+    if text.count(',') != header_commas + value_commas + separators:
+        return None
+    df = df[~df[0].str.startswith(TOMBSTONE)]
+    return df.values.tolist()
+
 def delete_print_log_entry(timestamp_to_delete: str) -> bool:
     """Deletes a specific entry from the print log CSV file based on the timestamp.
 
+    Matching lines are tombstoned in place (their first byte is overwritten
+    with TOMBSTONE) rather than rewriting the whole file; see compact_print_log.
+
     Args:
         timestamp_to_delete: The exact timestamp of the log entry to delete.
 
     Returns:
-        True if an entry was found and deletion was attempted (file rewritten),
+        True if an entry was found and marked as deleted,
         False otherwise (entry not found, file not found, or I/O error).
     """
+    global _tombstone_count, _offset_index
+    with _log_lock:
+        flush_print_log()
+        log_file = get_log_file_path()
+        if not os.path.isfile(log_file):
+            print(f"Log file {log_file} not found.")
+            return False
+
+        key = timestamp_to_delete.encode('utf-8') + b','
+
+        try:
+            with open(log_file, 'r+b') as f:
+                header_line = f.readline()
+                if not header_line.strip(): # Empty or malformed file
+                    print(f"Log file {log_file} is empty or has no header.")
+                    return False
+
+                if _offset_index is None:
+                    _offset_index, _tombstone_count = _build_offset_index(f)
+                offsets = _offset_index.pop(timestamp_to_delete, [])
+
+                # Guard against the file having been edited behind our back:
+                # every indexed line must still start with the timestamp.
+                for offset in offsets:
+                    f.seek(offset)
+                    if f.read(len(key)) != key:
+                        _offset_index, _tombstone_count = _build_offset_index(f)
+                        offsets = _offset_index.pop(timestamp_to_delete, [])
+                        break
+
+                for offset in offsets:
+                    f.seek(offset)
+                    f.write(TOMBSTONE.encode('utf-8'))
+            _note_own_write()
+            _invalidate_log_cache()
+
+            if not offsets:
+                print(f"No log entry found with timestamp: {timestamp_to_delete}")
+                return False # Entry not found
+
+            print(f"Successfully deleted {len(offsets)} log entry(s) with timestamp: {timestamp_to_delete}")
+            _tombstone_count += len(offsets)
+            if _tombstone_count >= COMPACT_AFTER_DELETES:
+                compact_print_log()
+            else:
+                _register_atexit()
+            return True
+
+        except IOError as e:
+            print(f"Error during file operation on {log_file}: {e}")
+            _reset_offset_index()
+            return False
+
+def compact_print_log() -> bool:
+    """Rewrites the print log without tombstoned rows.
+
+    Returns:
+        True if the file was rewritten (or does not exist), False on I/O error.
+    """
+    global _tombstone_count, _header_written
+    _close_log_fh()
     log_file = get_log_file_path()
     if not os.path.isfile(log_file):
-        print(f"Log file {log_file} not found.")
-        return False
-
-    rows_to_keep = []
-    deleted_count = 0
-    header_row = []
+        _tombstone_count = 0
+        return True
 
     try:
         with open(log_file, 'r', newline='', encoding='utf-8') as csvfile:
             reader = csv.reader(csvfile)
-            header_row = next(reader, None)
-            if not header_row: # Empty or malformed file
-                print(f"Log file {log_file} is empty or has no header.")
-                return False
-
-            rows_to_keep.append(header_row) # Keep the header
-
-            for row in reader:
-                if row: # Ensure row is not empty
-                    if row[0] == timestamp_to_delete:
-                        deleted_count += 1
-                    else:
-                        rows_to_keep.append(row)
-
-        if deleted_count == 0:
-            print(f"No log entry found with timestamp: {timestamp_to_delete}")
-            return False # Entry not found
+            header_row = next(reader, None) or LOG_HEADER
+            rows_to_keep = [row for row in reader if row and not row[0].startswith(TOMBSTONE)]
 
-        # Rewrite the file with the filtered rows
         with open(log_file, 'w', newline='', encoding='utf-8') as csvfile:
             writer = csv.writer(csvfile)
+            writer.writerow(header_row)
             writer.writerows(rows_to_keep)
-
-        print(f"Successfully deleted {deleted_count} log entry(s) with timestamp: {timestamp_to_delete}")
-        return True
-
-    except StopIteration: # Should be caught by header check, but good practice
-        print(f"Error: Log file {log_file} seems to be empty or improperly formatted (StopIteration).")
-        return False
-    except IndexError: # If a row doesn't have a timestamp column (e.g. malformed)
-        print(f"Error: Malformed row found in {log_file} while checking timestamp.")
-        return False
     except IOError as e:
-        print(f"Error during file operation on {log_file}: {e}")
+        print(f"Error compacting log file {log_file}: {e}")
         return False
 
+    _note_own_write()
+    _tombstone_count = 0
+    _header_written = True
+    _reset_offset_index()
+    _invalidate_log_cache()
+    return True
+
 def clear_all_print_logs() -> bool:
     """Clears all entries from the print log CSV file, leaving only the header.
 
@@ -125,19 +496,36 @@ def clear_all_print_logs() -> bool:
         True if the log was successfully cleared (or was already empty/missing and then created with header).
         False if an I/O error occurred.
     """
+    global _header_written, _tombstone_count
     log_file = get_log_file_path()
-    try:
-        # Overwrite the file, writing only the header.
-        # This handles cases where the file doesn't exist (it will be created)
-        # or is corrupted (it will be overwritten).
-        with open(log_file, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(LOG_HEADER)
-        print(f"Successfully cleared all print logs. File '{log_file}' now contains only the header.")
-        return True
-    except IOError as e:
-        print(f"Error clearing print log file {log_file}: {e}")
-        return False
+    text = io.StringIO()
+    csv.writer(text).writerow(LOG_HEADER)
+    header = text.getvalue().encode('utf-8')
+    with _log_lock:
+        # Rows still waiting in the buffer would be cleared along with the rest.
+        _log_buf.clear()
+        try:
+            if _log_fh is not None:
+                # Truncate through the open append handle instead of closing
+                # and recreating the file; appends continue at the new end.
+                _log_fh.truncate(0)
+                _log_fh.write(header)
+                _log_fh.flush()
+            else:
+                # This handles cases where the file doesn't exist (it will be created)
+                # or is corrupted (it will be overwritten).
+                with open(log_file, 'wb') as f:
+                    f.write(header)
+            _note_own_write()
+            _header_written = True
+            _tombstone_count = 0
+            _reset_offset_index()
+            _invalidate_log_cache()
+            print(f"Successfully cleared all print logs. File '{log_file}' now contains only the header.")
+            return True
+        except IOError as e:
+            print(f"Error clearing print log file {log_file}: {e}")
+            return False
 
 if __name__ == '__main__':
     # Example usage:
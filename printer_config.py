@@ -1,8 +1,18 @@
 # printer_config.py
 import os
 import json
+import copy
+
+try:
+    import orjson
+except ImportError: # orjson is optional; the json module is used without it
+    orjson = None
 
 class PrinterConfig:
+    # Parsed config files, keyed on path and checked against the file's mtime so
+    # repeated loads skip the open + JSON decode while the file is unchanged.
+    _cached: dict[str, tuple[int, dict]] = {}
+
     def __init__(self):
         self.config_file = "printer_config.json"
         self.default_paths = {
@@ -14,14 +24,13 @@ class PrinterConfig:
 
     def load_config(self):
         config_changed = False
-        if os.path.exists(self.config_file):
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-        else:
+        config = self._read_config_file()
+        if config is None:
             config = {
                 'selected_printers': [],
                 'last_sizes': {},
-                'last_paths': {}
+                'last_paths': {},
+                'direct_pdf_printers': []
             }
             config_changed = True # If file doesn't exist, it will be new, so defaults will be added.
 
@@ -36,10 +45,49 @@ class PrinterConfig:
 
         return config
 
+    def _read_config_file(self):
+        path = self.config_file
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            self._cached.pop(path, None)
+            return None
+
+        cached = self._cached.get(path)
+        if cached is not None and cached[0] == st.st_mtime_ns:
+            return copy.deepcopy(cached[1])
+
+        if orjson is not None:
+            with open(path, 'rb') as f:
+                config = orjson.loads(f.read())
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        self._cached[path] = (st.st_mtime_ns, config)
+        return copy.deepcopy(config)
+
+    @classmethod
+    def invalidate_cache(cls, config_file=None):
+        # Drop the cached config (for one file, or all) so the next load re-reads it.
+        # Call this after writing a config file from outside PrinterConfig.
+        if config_file is None:
+            cls._cached.clear()
+        else:
+            cls._cached.pop(config_file, None)
+
     def _save_config_data(self, config_data):
         # Internal method to save config data, used by load_config and save_config
-        with open(self.config_file, 'w', encoding='utf-8') as f:
-            json.dump(config_data, f, indent=4)
+        # The file stays indented because users edit it by hand (see README).
+        # Always written with json: orjson can only indent by 2, which would
+        # reformat every line of an existing 4-space file.
+        data = json.dumps(config_data, indent=4).encode('utf-8')
+        # Write to a temporary file and swap it in, so a crash mid-write never
+        # leaves a truncated printer_config.json behind.
+        tmp_file = self.config_file + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_file, self.config_file)
+        self.invalidate_cache(self.config_file)
 
     def save_config(self):
         # Public method to save the current state of self.config
@@ -1,27 +1,55 @@
 # printer_manager.py
 import os
-import sys
+import shutil
 import tempfile
-import win32print
-from functools import partial
+from functools import lru_cache
 
-from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
+from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout,
                                QHBoxLayout, QCheckBox, QLabel, QPushButton,
                                QFileDialog, QLineEdit, QSpinBox, QListWidget,
                                QGroupBox, QMessageBox, QFrame, QTabWidget,
-                               QTableWidget, QTableWidgetItem, QHeaderView)
-from PySide6.QtCore import Qt, QDateTime
+                               QTableView, QHeaderView)
+from PySide6.QtCore import Qt, QDateTime, QThreadPool, QFileSystemWatcher, QTimer
 from printer_config import PrinterConfig
 from printer_panel import PrinterPanel
-from print_logger import read_print_log, LOG_HEADER, delete_print_log_entry, clear_all_print_logs # Added clear_all_print_logs
+from print_history import PrintHistoryModel, HistoryActionDelegate, HistoryLoader
+from print_logger import (delete_print_log_entry, clear_all_print_logs, get_log_file_path,
+                          add_log_listener, remove_log_listener, log_changed_externally)
 
 def read_printers_from_file(file_path: str) -> list:
     printers = []
     if os.path.exists(file_path):
         with open(file_path, 'r', encoding='utf-8') as f:
-            printers = [line.strip() for line in f.readlines() if line.strip()]
+            printers = [s for line in f if (s := line.strip())]
     return printers
 
+@lru_cache(maxsize=1)
+def _find_ghostscript():
+    # The Ghostscript install location does not change while the app runs,
+    # so resolve it once per process. PATH is searched in-process with
+    # shutil.which instead of spawning 'where' through cmd.exe.
+    for exe in ('gswin64c.exe', 'gswin32c.exe', 'gs'):
+        found = shutil.which(exe)
+        if found:
+            return found
+    possible_paths = [
+        (r"C:\Program Files\gs\gs10.04.0\bin", "gswin64c.exe"),
+        (r"C:\Program Files (x86)\gs\gs10.04.0\bin", "gswin32c.exe"),
+    ]
+    # List each install directory once instead of stat'ing every candidate;
+    # a missing directory costs one failed scandir rather than a stat per file.
+    for parent, exe in possible_paths:
+        try:
+            with os.scandir(parent) as entries:
+                if any(e.name.lower() == exe and e.is_file() for e in entries):
+                    return os.path.join(parent, exe)
+        except OSError:
+            continue
+    return None
+
+# Bursts of external log changes within this window trigger a single reload.
+HISTORY_RELOAD_DELAY_MS = 150
+
 class PrinterManager(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -34,37 +62,24 @@ class PrinterManager(QMainWindow):
 
         self.printer_panels = {}
         self.temp_dir = tempfile.mkdtemp()
-        self.default_printer = win32print.GetDefaultPrinter()
         self.history_table = None
+        self.history_model = None
+        self._history_generation = 0
+        self._history_loading = False
         self.print_tab_widget = None
 
-        self.gs_path = self._find_ghostscript()
+        self.gs_path = _find_ghostscript()
         if not self.gs_path:
             QMessageBox.warning(self, "警告", "未找到 Ghostscript，请确保正确安装了 Ghostscript 10.04.0 或兼容版本。")
 
         self._init_ui()
 
-    def _find_ghostscript(self):
-        possible_paths = [
-            r"C:\Program Files\gs\gs10.04.0\bin\gswin64c.exe",
-            r"C:\Program Files (x86)\gs\gs10.04.0\bin\gswin32c.exe",
-        ]
-        for path in possible_paths:
-            if os.path.exists(path):
-                return path
-        try:
-            import subprocess
-            result = subprocess.run(['where', 'gswin64c.exe'], capture_output=True, text=True, check=True, shell=True)
-            if result.stdout.strip(): return result.stdout.strip().split('\n')[0]
-            result = subprocess.run(['where', 'gswin32c.exe'], capture_output=True, text=True, check=True, shell=True)
-            if result.stdout.strip(): return result.stdout.strip().split('\n')[0]
-        except Exception:
-            pass
-        return None
+    def closeEvent(self, event):
+        remove_log_listener(self._on_print_logged)
+        super().closeEvent(event)
 
     def __del__(self):
         try:
-            import shutil
             if hasattr(self, 'temp_dir') and os.path.exists(self.temp_dir):
                 shutil.rmtree(self.temp_dir)
         except Exception as e:
@@ -110,18 +125,36 @@ class PrinterManager(QMainWindow):
 
         history_layout.addLayout(top_button_layout) # Add the button layout to the main history tab layout
 
-        self.history_table = QTableWidget()
-        self.action_column_title = "操作"
-        self.history_table_headers = LOG_HEADER + [self.action_column_title]
-        self.history_table.setColumnCount(len(self.history_table_headers))
-        self.history_table.setHorizontalHeaderLabels(self.history_table_headers)
+        self.history_model = PrintHistoryModel(self)
+        self.history_table = QTableView()
+        self.history_table.setModel(self.history_model)
         self.history_table.setSortingEnabled(True)
-
-        self.history_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
-        action_column_idx = self.history_table_headers.index(self.action_column_title)
+        self.history_table.setSelectionBehavior(QTableView.SelectRows)
+        self.history_table.verticalHeader().setVisible(False)
+
+        action_column_idx = self.history_model.action_column
+        self.history_action_delegate = HistoryActionDelegate(self.history_table)
+        self.history_action_delegate.reprint_requested.connect(self._handle_history_reprint_row)
+        self.history_action_delegate.delete_requested.connect(self._handle_history_delete_row)
+        self.history_table.setItemDelegateForColumn(action_column_idx, self.history_action_delegate)
+
+        # Columns are sized once per load in _on_print_history_loaded; ResizeToContents
+        # mode would re-measure them on every model change.
+        self.history_table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
         self.history_table.horizontalHeader().setSectionResizeMode(action_column_idx, QHeaderView.Fixed)
         self.history_table.setColumnWidth(action_column_idx, 160)
 
+        # Rows logged by this program are added to the model as they are logged;
+        # the file is only re-read when another program changes it.
+        add_log_listener(self._on_print_logged)
+        self.log_watcher = QFileSystemWatcher(self)
+        self._watch_print_log()
+        self.log_watcher.fileChanged.connect(self._on_print_log_file_changed)
+        self._history_reload_timer = QTimer(self)
+        self._history_reload_timer.setSingleShot(True)
+        self._history_reload_timer.setInterval(HISTORY_RELOAD_DELAY_MS)
+        self._history_reload_timer.timeout.connect(self._load_print_history)
+
         history_layout.addWidget(self.history_table) # Add table below buttons
 
         self.tabs_widget.addTab(history_tab_widget, "打印历史")
@@ -137,57 +170,64 @@ class PrinterManager(QMainWindow):
         if not self.history_table:
             return
 
-        log_data = read_print_log()
-        self.history_table.setSortingEnabled(False)
-        self.history_table.setRowCount(0)
+        # Read the log off the GUI thread; only the newest request's result is shown.
+        self._history_generation += 1
+        self._history_loading = True
+        loader = HistoryLoader(self._history_generation)
+        loader.signals.loaded.connect(self._on_print_history_loaded)
+        QThreadPool.globalInstance().start(loader)
 
-        if not log_data:
-            self.history_table.setSortingEnabled(True)
+    def _on_print_history_loaded(self, generation: int, log_data, error):
+        if generation != self._history_generation:
             return
+        self._history_loading = False
+        if error is not None:
+            QMessageBox.warning(self, "读取失败", f"无法读取打印记录:\n{error}")
+            return
+        self.history_table.setUpdatesEnabled(False)
+        try:
+            self.history_model.set_records(log_data or [])
+            for col_idx in range(self.history_model.action_column):
+                self.history_table.resizeColumnToContents(col_idx)
+        finally:
+            self.history_table.setUpdatesEnabled(True)
+
+    def _watch_print_log(self):
+        log_path = get_log_file_path()
+        if log_path not in self.log_watcher.files() and os.path.exists(log_path):
+            self.log_watcher.addPath(log_path)
+
+    def _on_print_log_file_changed(self, path: str):
+        # Rewriting a file can drop it from the watch list; watch it again.
+        self._watch_print_log()
+        if log_changed_externally() and not self._history_reload_timer.isActive():
+            self._history_reload_timer.start()
+
+    def _on_print_logged(self, records: list):
+        if self._history_loading:
+            # The load in flight may have read the log before these rows were
+            # written; start a fresh one, which is certain to include them.
+            self._load_print_history()
+        else:
+            self.history_model.add_records(records)
+        self._watch_print_log()
 
-        self.history_table.setRowCount(len(log_data))
-        action_column_idx = self.history_table_headers.index(self.action_column_title)
-
-        for row_idx, record in enumerate(reversed(log_data)):
-            for col_idx, item_text in enumerate(record):
-                table_item = QTableWidgetItem(item_text)
-                table_item.setFlags(table_item.flags() & ~Qt.ItemIsEditable)
-                self.history_table.setItem(row_idx, col_idx, table_item)
-
-            timestamp_for_buttons = record[0]
-            sku_basename = record[1]
-            quantity_str = record[2]
-            printer_name_for_reprint = record[3]
-
-            try:
-                quantity = int(quantity_str)
-            except ValueError:
-                quantity = 1
-                print(f"Warning: Could not parse quantity '{quantity_str}' for log entry: {record}. Defaulting to 1.")
-
-            action_widget = QWidget()
-            action_layout = QHBoxLayout(action_widget)
-            action_layout.setContentsMargins(5, 0, 5, 0)
-            action_layout.setSpacing(5)
-
-            reprint_button = QPushButton("重打")
-            reprint_button.clicked.connect(
-                partial(self._handle_reprint_button_clicked,
-                        printer_name_for_reprint,
-                        sku_basename,
-                        quantity)
-            )
-            action_layout.addWidget(reprint_button)
-
-            delete_button = QPushButton("删除")
-            delete_button.clicked.connect(
-                partial(self._handle_delete_button_clicked, timestamp_for_buttons)
-            )
-            action_layout.addWidget(delete_button)
-
-            self.history_table.setCellWidget(row_idx, action_column_idx, action_widget)
+    def _handle_history_reprint_row(self, row: int):
+        record = self.history_model.record(row)
+        sku_basename = record[1]
+        quantity_str = record[2]
+        printer_name_for_reprint = record[3]
 
-        self.history_table.setSortingEnabled(True)
+        try:
+            quantity = int(quantity_str)
+        except ValueError:
+            quantity = 1
+            print(f"Warning: Could not parse quantity '{quantity_str}' for log entry: {record}. Defaulting to 1.")
+
+        self._handle_reprint_button_clicked(printer_name_for_reprint, sku_basename, quantity)
+
+    def _handle_history_delete_row(self, row: int):
+        self._handle_delete_button_clicked(self.history_model.record(row)[0])
 
     def _handle_reprint_button_clicked(self, printer_name: str, sku_basename: str, quantity: int):
         target_panel = self.printer_panels.get(printer_name)
@@ -221,8 +261,8 @@ class PrinterManager(QMainWindow):
         if reply == QMessageBox.Yes:
             deleted = delete_print_log_entry(timestamp_to_delete)
             if deleted:
+                self.history_model.remove_timestamp(timestamp_to_delete)
                 QMessageBox.information(self, "删除成功", "选择的打印记录已成功删除。")
-                self._load_print_history()
             else:
                 QMessageBox.warning(self, "删除失败", "未能删除选择的打印记录。\n记录可能已被移除或发生文件错误。")
 
@@ -234,14 +274,9 @@ class PrinterManager(QMainWindow):
         if reply == QMessageBox.Yes:
             cleared = clear_all_print_logs()
             if cleared:
+                self._history_generation += 1 # Drop any load still in flight
+                self._history_loading = False
+                self.history_model.set_records([])
                 QMessageBox.information(self, "清空成功", "所有打印记录已成功删除。")
-                self._load_print_history() # Refresh the table, it should be empty
             else:
                 QMessageBox.warning(self, "清空失败", "清空所有打印记录失败。\n可能发生文件错误。")
-
-
-if __name__ == '__main__':
-    app = QApplication(sys.argv)
-    manager = PrinterManager()
-    manager.show()
-    sys.exit(app.exec())
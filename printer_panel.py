@@ -1,18 +1,284 @@
 import win32print
+import pywintypes
+import logging
 import os
+import re
+import stat
 import fitz  # PyMuPDF
 from PySide6.QtWidgets import (QGroupBox, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton,
-                               QFileDialog, QSpinBox, QListWidget, QLabel, QMessageBox, QWidget)
-from PySide6.QtCore import Qt, QDateTime, QEvent
+                               QFileDialog, QSpinBox, QListView, QLabel, QMessageBox, QWidget)
+from PySide6.QtCore import (Qt, QEvent, QObject, QProcess, QRunnable, QStringListModel,
+                            QFileSystemWatcher, QThreadPool, QTimer, Signal)
+from PySide6.QtGui import QDragEnterEvent, QDropEvent
 from typing import Optional
-from pathlib import Path
 import subprocess
 import sys # Added for sys.platform
-from print_logger import log_print_job
-
-
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from print_logger import log_print_jobs
+
+log = logging.getLogger(__name__)
+
+
+# Timestamp format used for the print log and the queue list.
+_TS_FMT = '%Y-%m-%d %H:%M:%S'
+
+# Page geometry handed to Ghostscript, in PostScript points.
+_PT_PER_MM = 2.834645669291339
+_MM_PER_PT = 0.352778
+_OFFSET_X_PT = 2.8 * _PT_PER_MM
+_OFFSET_Y_PT = -1.0 * _PT_PER_MM
+_SCALE = 0.982
+_PAGE_POLICY_STR = "<< /Policies << /PageSize 3 >> >> setpagedevice"
+_SETPAGEDEV_STR = f"<< /PageOffset [{_OFFSET_X_PT} {_OFFSET_Y_PT}] /BeginPage {{ {_SCALE} dup scale }}  >> setpagedevice"
+
+# Print jobs that run Python code (RAW spooling) are I/O bound, so panels
+# for different printers can print at the same time. More than 4 workers buys nothing on typical workstations.
+# One-shot Ghostscript runs use QProcess instead and need no thread.
+_print_executor = ThreadPoolExecutor(max_workers=min(os.cpu_count() or 1, 4),
+                                  thread_name_prefix="ghostscript")
+
+
+# How long a non-fatal warning stays in a panel's status line.
+_STATUS_TIMEOUT_MS = 5000
+
+def _set_default_printer(printer_name: str):
+    # Every print path names its printer explicitly, so the Windows default
+    # only needs to follow the panel in use. GetDefaultPrinter is a local
+    # call and, unlike a cached name, notices changes made outside the app;
+    # the spooler round-trip of SetDefaultPrinter is skipped when it matches.
+    try:
+        current = win32print.GetDefaultPrinter()
+    except pywintypes.error:  # No default printer set
+        current = None
+    if current != printer_name:
+        win32print.SetDefaultPrinter(printer_name)
+
+
+def _hide_console_window(args):
+    # QProcess counterpart of subprocess' creationflags=CREATE_NO_WINDOW.
+    args.flags |= subprocess.CREATE_NO_WINDOW
+
+
+# Flags shared by every Ghostscript print, whatever the printer or label size.
+_GS_COMMON = ("-dNOPAUSE", "-dBATCH", "-dSAFER", "-sDEVICE=mswinpr2")
+
+
+@lru_cache(maxsize=64)
+def _gs_common_flags(gs_path: str, printer_name: str, width_mm: int, height_mm: int,
+                     orient: str) -> tuple:
+    # The device/page flags are the same for every label of a given size on a
+    # printer, so build them once and share the immutable tuple. The copy
+    # count varies per job and is kept out of the cache key.
+    return (
+        gs_path,
+        *_GS_COMMON,
+        f"-sOutputFile=%printer%{printer_name}",
+        f"-dDEVICEWIDTHPOINTS={width_mm * _PT_PER_MM}",
+        f"-dDEVICEHEIGHTPOINTS={height_mm * _PT_PER_MM}",
+        "-dORIENT1=" + orient,
+    )
+
+
+# Page setup fragment run before the first input file; the separator page
+# shares it and only drops the copy count back to one.
+_GS_PAGE_SETUP = ("-c", _PAGE_POLICY_STR, _SETPAGEDEV_STR, "-f")
+_GS_SEPARATOR_SETUP = ("-c", "<< /NumCopies 1 >> setpagedevice", "-f")
+
+
+def _build_gs_command(gs_flags: tuple, file_path: str, copies: int,
+                      separator_path: Optional[str] = None) -> list:
+    # Full argv for a one-shot Ghostscript run: the label copies, then the
+    # separator page (if any) in the same process.
+    command = [*gs_flags, f"-dNumCopies={copies}", *_GS_PAGE_SETUP, file_path]
+    if separator_path:
+        command += [*_GS_SEPARATOR_SETUP, separator_path]
+    return command
+
+
+def _spool_pdf_raw(printer_name: str, pdf_path: str, copies: int,
+                   separator_path: Optional[str] = None):
+    # Sends the PDF bytes to the spooler as a RAW job, for printers whose
+    # firmware renders PDF natively. Each copy is its own spool document since
+    # concatenated PDF files are not a valid PDF stream.
+    with open(pdf_path, 'rb') as f:
+        data = f.read()
+    documents = [(os.path.basename(pdf_path), data)] * copies
+    if separator_path:
+        with open(separator_path, 'rb') as f:
+            documents.append((os.path.basename(separator_path), f.read()))
+
+    h_printer = win32print.OpenPrinter(printer_name)
+    try:
+        for doc_name, doc_data in documents:
+            win32print.StartDocPrinter(h_printer, 1, (doc_name, None, "RAW"))
+            try:
+                win32print.StartPagePrinter(h_printer)
+                win32print.WritePrinter(h_printer, doc_data)
+                win32print.EndPagePrinter(h_printer)
+            finally:
+                win32print.EndDocPrinter(h_printer)
+    finally:
+        win32print.ClosePrinter(h_printer)
+
+
+class _PrintSignals(QObject):
+    # Emitted from a worker thread; Qt queues delivery onto the GUI thread.
+    finished = Signal(object, object)
+
+
+def _is_pdf(name: str) -> bool:
+    # Explorer happily hands over "LABEL.PDF"; the extension is not case-sensitive.
+    return name[-4:].lower() == '.pdf'
+
+
+def _stat_regular_file(path: str) -> Optional[os.stat_result]:
+    # One stat call answers both "does it exist" and "is it a file".
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st if stat.S_ISREG(st.st_mode) else None
+
+
+class _FolderWatcher(QObject):
+    # Emits changed when files are added to or removed from a folder, so the
+    # common-files lists follow other_folder. Shared by all panels through
+    # _folder_watcher.
+    changed = Signal()
+
+    def __init__(self, folder: str):
+        super().__init__()
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(lambda path: self.changed.emit())
+        if os.path.isdir(folder):
+            self._watcher.addPath(folder)
+
+
+_folder_watchers = {}
+
+
+def _folder_watcher(folder: str) -> _FolderWatcher:
+    watcher = _folder_watchers.get(folder)
+    if watcher is None:
+        watcher = _folder_watchers[folder] = _FolderWatcher(folder)
+    return watcher
+
+
+# MuPDF keeps a global object store that grows across documents; empty it
+# every this many opens so long SKU sessions don't accumulate memory.
+_STORE_SHRINK_INTERVAL = 50
+_pdf_open_count = 0
+# PDFs are sized on QThreadPool threads; PyMuPDF is not thread-safe.
+_fitz_lock = threading.Lock()
+
+
+_MEDIABOX_SCAN_BYTES = 65536
+_MEDIABOX_RE = re.compile(
+    rb'/MediaBox\s*\[\s*([-\d.]+)\s+([-\d.]+)\s+([-\d.]+)\s+([-\d.]+)\s*\]')
+# Any of these could change page 0's rect without showing up next to its
+# MediaBox; object streams can hide either key in compressed data.
+_AMBIGUOUS_BOX_RE = re.compile(rb'/CropBox|/Rotate\s+-?[1-9]|/ObjStm')
+
+
+# Readers accept the %PDF- header anywhere in the first KiB of the file.
+_PDF_MAGIC = b'%PDF-'
+_PDF_MAGIC_SEARCH_BYTES = 1024
+
+
+def _fast_mediabox(pdf_path: str) -> Optional[tuple]:
+    # Label PDFs are usually a single uncompressed page, so page 0's size (in
+    # points) can be read from the MediaBox with a bounded byte scan instead of
+    # a full PyMuPDF open. Returns None whenever the answer would be ambiguous
+    # (several boxes, a CropBox or rotation that changes page.rect, or a file
+    # too large to scan completely) so the caller falls back to PyMuPDF.
+    # Raises ValueError for files that are not PDFs at all (empty files from an
+    # aborted copy, HTML error pages saved as .pdf), so they never reach MuPDF.
+    with open(pdf_path, 'rb') as f:
+        buf = f.read(_MEDIABOX_SCAN_BYTES + 1)
+    if _PDF_MAGIC not in buf[:_PDF_MAGIC_SEARCH_BYTES]:
+        raise ValueError(f"不是有效的 PDF 文件: {pdf_path}")
+    if len(buf) > _MEDIABOX_SCAN_BYTES:
+        # A /Rotate or /CropBox past the scanned bytes would go unseen.
+        return None
+
+    boxes = _MEDIABOX_RE.findall(buf)
+    if len(boxes) != 1 or _AMBIGUOUS_BOX_RE.search(buf):
+        return None
+    try:
+        x0, y0, x1, y1 = (float(v) for v in boxes[0])
+    except ValueError:
+        return None
+    return abs(x1 - x0), abs(y1 - y0)
+
+
+def _page0_rotation(doc) -> int:
+    # /Rotate of the first page, following the page tree up since the key is
+    # inheritable. Reads only dictionary entries, no page content.
+    xref = doc.page_xref(0)
+    for _ in range(32):  # guards against a cyclic /Parent chain
+        kind, value = doc.xref_get_key(xref, "Rotate")
+        if kind == "int":
+            return int(value) % 360
+        kind, value = doc.xref_get_key(xref, "Parent")
+        if kind != "xref":
+            break
+        xref = int(value.split()[0])
+    return 0
+
+
+@lru_cache(maxsize=512)
+def _analyze_pdf_dims(pdf_path: str, mtime_ns: int, size: int) -> tuple:
+    # mtime_ns and size are only part of the cache key, so an edited or
+    # replaced PDF is re-analyzed while reprints of the same file are free.
+    global _pdf_open_count
+    dims = _fast_mediabox(pdf_path)
+    if dims is None:
+        with _fitz_lock:
+            with fitz.open(pdf_path) as doc:
+                # page_cropbox reads the box without loading a Page object (content
+                # streams, annotations); apply /Rotate ourselves as page.rect would.
+                rect = doc.page_cropbox(0)
+                rotation = _page0_rotation(doc)
+
+            _pdf_open_count += 1
+            if _pdf_open_count % _STORE_SHRINK_INTERVAL == 0:
+                fitz.TOOLS.store_shrink(100)
+        dims = (rect.width, rect.height)
+        if rotation in (90, 270):
+            dims = dims[::-1]
+
+    width = dims[0] * _MM_PER_PT
+    height = dims[1] * _MM_PER_PT
+
+    is_landscape = width > height
+    if is_landscape:
+        width, height = height, width
+    return (round(width, 1), round(height, 1)), is_landscape
+
+
+class _SizeSignals(QObject):
+    # (path, mtime_ns, size) key, (size, is_landscape) or None, error message
+    finished = Signal(object, object, object)
+
+
+class _SizeWorker(QRunnable):
+    # Runs _analyze_pdf_dims on a QThreadPool thread so a slow PyMuPDF open
+    # does not freeze the window.
+    def __init__(self, key: tuple):
+        super().__init__()
+        self.key = key
+        self.signals = _SizeSignals()
+
+    def run(self):
+        try:
+            result, error = _analyze_pdf_dims(*self.key), None
+        except Exception as e:
+            result, error = None, str(e)
+        self.signals.finished.emit(self.key, result, error)
 
-from PySide6.QtGui import QDragEnterEvent, QDropEvent
 
 class DragDropLineEdit(QLineEdit):
     def __init__(self, *args, **kwargs):
@@ -25,9 +291,8 @@ class DragDropLineEdit(QLineEdit):
 
     def dropEvent(self, event: QDropEvent):
         if event.mimeData().hasUrls():
-            url = event.mimeData().urls()[0]
-            file_path = url.toLocalFile()
-            if file_path.endswith('.pdf'):
+            file_path = event.mimeData().urls()[0].toLocalFile()
+            if _is_pdf(file_path):
                 self.setText(file_path)
                 event.acceptProposedAction()
 
@@ -50,9 +315,22 @@ class PrinterPanel:
         self.printer_config = printer_config
         self.config = printer_config.get_config()
         self.manager = parent_manager
+        # Folder settings are fixed for the session; keep plain strings at hand.
+        self._sku_folder = str(self.manager.temuskupdf_folder)
+        self._other_folder = str(self.manager.other_folder or '')
+        self._common_watcher = _folder_watcher(self._other_folder)
         self.panel = self._create_panel()
+        self._common_watcher.changed.connect(self._load_common_files)
         self.is_active = False
         self.current_pdf_size = None
+        self.is_landscape = False
+        self._analyzed_key = None  # (path, mtime_ns, size) that current_pdf_size belongs to
+        self._pending_size_key = None  # key a _SizeWorker is currently analyzing
+        self._size_waiter = None  # print continuation waiting for that result
+        self._print_future = None
+        self._gs_proc = None
+        self._print_signals = _PrintSignals()
+        self._print_signals.finished.connect(self._on_print_finished)
 
     def _create_panel(self) -> QGroupBox:
         panel = QGroupBox(f"打印机: {self.printer_name}")
@@ -77,20 +355,38 @@ class PrinterPanel:
         copies_layout.addWidget(self.copies_spinbox)
         layout.addLayout(copies_layout)
 
-        print_btn = QPushButton("打印")
-        print_btn.clicked.connect(self._print_file)
-        layout.addWidget(print_btn)
+        self.print_btn = QPushButton("打印")
+        self.print_btn.clicked.connect(self._print_file)
+        layout.addWidget(self.print_btn)
+
+        # Non-fatal warnings go here instead of a modal dialog, so they never
+        # hold up the next scan.
+        self.status_label = QLabel()
+        self.status_label.setStyleSheet("QLabel { color: red; }")
+        self.status_label.setWordWrap(True)
+        layout.addWidget(self.status_label)
+        self._status_timer = QTimer(panel)
+        self._status_timer.setSingleShot(True)
+        self._status_timer.timeout.connect(self.status_label.clear)
 
         queue_label = QLabel("打印队列:")
         layout.addWidget(queue_label)
-        self.queue_list = QListWidget()
+        self.queue_model = QStringListModel()
+        self.queue_list = QListView()
+        self.queue_list.setModel(self.queue_model)
+        self.queue_list.setUniformItemSizes(True)
+        self.queue_list.setEditTriggers(QListView.NoEditTriggers)
         layout.addWidget(self.queue_list)
 
         # 常用打印文件区域
         common_files_label = QLabel("常用打印文件:")
         layout.addWidget(common_files_label)
-        self.common_files_list = QListWidget()
-        self.common_files_list.itemDoubleClicked.connect(self._print_common_file)
+        self.common_files_model = QStringListModel()
+        self.common_files_list = QListView()
+        self.common_files_list.setModel(self.common_files_model)
+        self.common_files_list.setUniformItemSizes(True)
+        self.common_files_list.setEditTriggers(QListView.NoEditTriggers)
+        self.common_files_list.doubleClicked.connect(self._print_common_file)
         self._load_common_files()
         layout.addWidget(self.common_files_list)
 
@@ -100,12 +396,15 @@ class PrinterPanel:
 
     def _set_file(self):
         file_name = self.file_path.text().strip()
-        if not file_name.endswith('.pdf'):
+        if not _is_pdf(file_name):
             file_name += '.pdf'
-        folder_path = Path(self.manager.temuskupdf_folder) # Use configured path
-        full_path = os.path.join(folder_path, file_name)
-        if os.path.exists(full_path):
+        full_path = os.path.join(self._sku_folder, file_name) # Use configured path
+        file_stat = _stat_regular_file(full_path)
+        if file_stat:
             self.file_path.setText(full_path)
+            # Size the label now, while the operator types the quantity, so
+            # _print_file can reuse the result instead of analyzing again.
+            self._request_size((full_path, file_stat.st_mtime_ns, file_stat.st_size))
             self.copies_spinbox.setValue(0)  # 将打印数量清空
             self.copies_spinbox.setFocus()
         else:
@@ -118,8 +417,14 @@ class PrinterPanel:
             QSpinBox.keyPressEvent(self.copies_spinbox, event)
 
     def _print_file(self):
+        if (self._print_future is not None or self._gs_proc is not None
+                or self._size_waiter is not None):
+            self._warn("上一个打印任务尚未完成，请稍候")
+            return
+
         file_path = self.file_path.text()
-        if not file_path or not os.path.exists(file_path):
+        file_stat = _stat_regular_file(file_path) if file_path else None
+        if not file_stat:
             QMessageBox.warning(self.parent_widget, "警告", "请先选择有效的PDF文件")
             return
 
@@ -128,12 +433,54 @@ class PrinterPanel:
             self.parent_widget.raise_()
 
             # 设置打印机
-            win32print.SetDefaultPrinter(self.printer_name)
+            _set_default_printer(self.printer_name)
+
+            # Resolve the separator page up front so it can ride along in the
+            # same print job instead of paying a second start-up.
+            separator_pdf_name = "分割72.pdf"
+            full_separator_path = None
+            separator_warning = None
+            if self._other_folder:
+                candidate = os.path.join(self._other_folder, separator_pdf_name)
+                if os.path.exists(candidate):
+                    full_separator_path = candidate
+                else:
+                    separator_warning = ("分隔页文件未找到", f"分隔页文件 {separator_pdf_name} 在目录 {self._other_folder} 中未找到。跳过打印分隔页。")
+            else:
+                separator_warning = ("配置错误", "无法确定 'other_folder' 路径，跳过打印分隔页。")
+
+            job = {
+                'file_path': file_path,
+                'copies': self.copies_spinbox.value(),
+                'separator_pdf_name': separator_pdf_name,
+                'full_separator_path': full_separator_path,
+                'separator_warning': separator_warning,
+            }
+
+            if self.printer_name in self.config.get('direct_pdf_printers', []):
+                # The printer interprets PDF itself: hand the file straight to
+                # the spooler and skip PDF sizing and Ghostscript entirely.
+                self._submit_print(job, _spool_pdf_raw, self.printer_name, file_path,
+                                   job['copies'], full_separator_path)
+            else:
+                # 分析 PDF 尺寸 (reuse the result from _set_file when the file is unchanged)
+                key = (file_path, file_stat.st_mtime_ns, file_stat.st_size)
+                if self._analyzed_key == key:
+                    self._print_with_ghostscript(job, self.current_pdf_size)
+                else:
+                    self.print_btn.setEnabled(False)
+                    self._request_size(key, lambda size: self._print_with_ghostscript(job, size))
+
+        except Exception as e:
+            QMessageBox.warning(self.parent_widget, "打印错误", str(e))
 
-            # 分析 PDF 尺寸
-            size = self._analyze_and_update_size(file_path)
+    def _print_with_ghostscript(self, job: dict, size: Optional[tuple]):
+        file_path = job['file_path']
+        full_separator_path = job['full_separator_path']
+        try:
             if not size:
                 QMessageBox.warning(self.parent_widget, "警告", "无法获取 PDF 尺寸")
+                self.print_btn.setEnabled(True)
                 return
 
             width_cm, height_cm = size
@@ -144,159 +491,167 @@ class PrinterPanel:
             gs_path = self.manager.gs_path
             if not gs_path:
                 QMessageBox.warning(self.parent_widget, "警告", "未找到ghostscript，请确保正确安装了Ghostscript 10.04.0")
+                self.print_btn.setEnabled(True)
                 return
 
-            # Setup creation flags for subprocess to hide console window on Windows
-            creation_flags = 0
-            if sys.platform == "win32":
-                creation_flags = subprocess.CREATE_NO_WINDOW
-
-            command = [
-                gs_path,
-                "-dNOPAUSE",
-                "-dBATCH",
-                "-dSAFER",
-                "-sDEVICE=mswinpr2",
-                f"-sOutputFile=%printer%{self.printer_name}",
-                "-dNumCopies=" + str(self.copies_spinbox.value()),
-                f"-dDEVICEWIDTHPOINTS={width_mm * 2.834645669291339}",
-                f"-dDEVICEHEIGHTPOINTS={height_mm * 2.834645669291339}",
-                "-dORIENT1=" + ("1" if hasattr(self, 'is_landscape') and self.is_landscape else "0"),
-                "-c",
-                "<< /Policies << /PageSize 3 >> >> setpagedevice",
-                f"<< /PageOffset [{2.8 * 2.834645669291339} -{1 * 2.834645669291339}] /BeginPage {{ {0.982} dup scale }}  >> setpagedevice",
-                "-f",
-                file_path
-            ]
-
-            result = subprocess.run(
-                command,
-                check=True,
-                capture_output=True,
-                text=True,
-                shell=True, # Added shell=True for consistency and potential path issues
-                creationflags=creation_flags
-            )
-            if result.returncode == 0:
-                filename = os.path.basename(file_path)
-                current_time = QDateTime.currentDateTime().toString("yyyy-MM-dd hh:mm:ss")
-                copies = self.copies_spinbox.value()
-
-                # Log the print job
-                log_print_job(
-                    timestamp=current_time,
-                    sku_or_filename=filename,
-                    quantity=copies,
-                    printer_name=self.printer_name,
-                    status="Printed"
-                )
-                # Refresh the history tab in the main manager UI
-                if self.manager and hasattr(self.manager, '_load_print_history'):
-                    self.manager._load_print_history()
-
-                new_item = f"{current_time} - 打印文件: {filename} (份数: {copies}) - 已打印"
-                self.queue_list.insertItem(0, new_item)
-
-                # --- Try to print separator page ---
-                separator_pdf_name = "分割72.pdf"
-                if self.manager and self.manager.other_folder:
-                    full_separator_path = os.path.join(self.manager.other_folder, separator_pdf_name)
-                    if os.path.exists(full_separator_path):
-                        # gs_path, width_mm, height_mm, self.is_landscape are from the main document processing
-                        command_separator = [
-                            gs_path,
-                            "-dNOPAUSE", "-dBATCH", "-dSAFER",
-                            "-sDEVICE=mswinpr2",
-                            f"-sOutputFile=%printer%{self.printer_name}",
-                            "-dNumCopies=1", # Force 1 copy for separator
-                            f"-dDEVICEWIDTHPOINTS={width_mm * 2.834645669291339}",
-                            f"-dDEVICEHEIGHTPOINTS={height_mm * 2.834645669291339}",
-                            "-dORIENT1=" + ("1" if hasattr(self, 'is_landscape') and self.is_landscape else "0"),
-                            "-c",
-                            "<< /Policies << /PageSize 3 >> >> setpagedevice",
-                            # Using the same page offset and scaling as the main document for the separator.
-                            # This might need adjustment if separator pages have different layout requirements.
-                            f"<< /PageOffset [{2.8 * 2.834645669291339} -{1 * 2.834645669291339}] /BeginPage {{ {0.982} dup scale }}  >> setpagedevice",
-                            "-f",
-                            full_separator_path
-                        ]
-                        try:
-                            result_separator = subprocess.run(
-                                command_separator,
-                                check=True,
-                                capture_output=True,
-                                text=True,
-                                shell=True,
-                                creationflags=creation_flags # Added creationflags
-                            )
-                            if result_separator.returncode == 0:
-                                separator_time = QDateTime.currentDateTime().toString("yyyy-MM-dd hh:mm:ss")
-                                log_print_job(
-                                    timestamp=separator_time,
-                                    sku_or_filename=separator_pdf_name,
-                                    quantity=1,
-                                    printer_name=self.printer_name,
-                                    status="Printed Separator" # Differentiate status
-                                )
-                                if self.manager and hasattr(self.manager, '_load_print_history'):
-                                    self.manager._load_print_history()
-                                # Optionally add to local queue_list as well
-                                separator_queue_item = f"{separator_time} - 打印文件: {separator_pdf_name} (份数: 1) - 已打印"
-                                self.queue_list.insertItem(1, separator_queue_item) # Insert below main item
-                            else:
-                                QMessageBox.warning(self.parent_widget, "打印分隔页错误", f"打印分隔页 {separator_pdf_name} 失败: {result_separator.stderr}")
-                        except Exception as sep_e:
-                            QMessageBox.warning(self.parent_widget, "打印分隔页异常", f"打印分隔页 {separator_pdf_name} 时发生错误: {str(sep_e)}")
-                    else:
-                        QMessageBox.warning(self.parent_widget, "分隔页文件未找到", f"分隔页文件 {separator_pdf_name} 在目录 {self.manager.other_folder} 中未找到。跳过打印分隔页。")
-                else:
-                    QMessageBox.warning(self.parent_widget, "配置错误", "无法确定 'other_folder' 路径，跳过打印分隔页。")
-
-                # Reset for next print job (after main and potential separator)
-                self.file_path.clear()
-                self.copies_spinbox.setValue(1)
-                self.file_path.setFocus()
-            else:
-                raise Exception(f"打印失败: {result.stderr}")
+            orient = str(int(self.is_landscape))
+            gs_flags = _gs_common_flags(gs_path, self.printer_name, width_mm, height_mm, orient)
+            command = _build_gs_command(gs_flags, file_path, job['copies'], full_separator_path)
+            self._start_gs_process(job, command)
 
         except Exception as e:
+            self.print_btn.setEnabled(True)
             QMessageBox.warning(self.parent_widget, "打印错误", str(e))
 
-    def _analyze_and_update_size(self, pdf_path: str) -> Optional[tuple]:
+    def _submit_print(self, job: dict, fn, *args):
+        # Disable first: a job that has already finished runs the callback
+        # (and re-enables the button) inside add_done_callback.
+        self.print_btn.setEnabled(False)
+        self._print_future = _print_executor.submit(fn, *args)
+        self._print_future.add_done_callback(
+            lambda future: self._print_signals.finished.emit(job, future))
+
+    def _start_gs_process(self, job: dict, command: list):
+        # Ghostscript runs alongside the event loop; the window stays usable
+        # and _on_gs_process_finished picks up the result.
+        proc = QProcess(self.panel)
+        proc.setProgram(command[0])
+        proc.setArguments(command[1:])
+        proc.setStandardOutputFile(QProcess.nullDevice())  # stdout is never read
+        if sys.platform == "win32":
+            proc.setCreateProcessArgumentsModifier(_hide_console_window)
+        proc.finished.connect(
+            lambda exit_code, exit_status: self._on_gs_process_finished(job, proc))
+        proc.errorOccurred.connect(
+            lambda error: self._on_gs_process_error(job, proc, error))
+        self._gs_proc = proc
+        self.print_btn.setEnabled(False)
+        proc.start()
+
+    def _on_gs_process_finished(self, job: dict, proc: QProcess):
+        self._gs_proc = None
+        proc.deleteLater()
+        if proc.exitStatus() != QProcess.NormalExit or proc.exitCode() != 0:
+            stderr = proc.readAllStandardError().data().decode(errors='replace').strip()
+            self._finish_print_job(job, f"打印失败: {stderr or f'Ghostscript 退出代码 {proc.exitCode()}'}")
+        else:
+            self._finish_print_job(job, None)
+
+    def _on_gs_process_error(self, job: dict, proc: QProcess, error):
+        # finished is not emitted when the process could not be started at all.
+        if error == QProcess.FailedToStart:
+            self._gs_proc = None
+            proc.deleteLater()
+            self._finish_print_job(job, f"打印失败: {proc.errorString()}")
+
+    def _on_print_finished(self, job: dict, future):
+        self._print_future = None
         try:
-            doc = fitz.open(pdf_path)
-            page = doc[0]
-            width = page.rect.width * 0.352778
-            height = page.rect.height * 0.352778
+            future.result()  # re-raises whatever the print job raised
+        except Exception as e:
+            self._finish_print_job(job, str(e))
+            return
+        self._finish_print_job(job, None)
 
-            is_landscape = width > height
-            if is_landscape:
-                width, height = height, width
+    def _finish_print_job(self, job: dict, error: Optional[str]):
+        self.print_btn.setEnabled(True)
+        if error:
+            QMessageBox.warning(self.parent_widget, "打印错误", error)
+            return
 
-            size = (round(width, 1), round(height, 1))
-            self.config['last_sizes'][self.printer_name] = size
+        file_path = job['file_path']
+        separator_pdf_name = job['separator_pdf_name']
+        full_separator_path = job['full_separator_path']
+        filename = os.path.basename(file_path)
+        current_time = datetime.now().strftime(_TS_FMT)
+        copies = job['copies']
+
+        # Log the print job (and its separator) with a single append
+        log_rows = [(current_time, filename, copies, self.printer_name, "Printed")]
+        if full_separator_path:
+            # Differentiate status
+            log_rows.append((current_time, separator_pdf_name, 1, self.printer_name, "Printed Separator"))
+        # The history tab picks the new rows up through its log listener
+        log_print_jobs(log_rows)
+
+        queue_items = [f"{current_time} - 打印文件: {filename} (份数: {copies}) - 已打印"]
+        if full_separator_path:
+            # Listed below the main item
+            queue_items.append(f"{current_time} - 打印文件: {separator_pdf_name} (份数: 1) - 已打印")
+        self._prepend_queue_items(queue_items)
+        if not full_separator_path and job['separator_warning']:
+            title, message = job['separator_warning']
+            self._warn(f"{title}: {message}")
+
+        # Reset for next print job (after main and potential separator),
+        # unless the operator already moved on to another file.
+        if self.file_path.text() == file_path:
+            self.file_path.clear()
+            self.copies_spinbox.setValue(1)
+            self.file_path.setFocus()
+
+    def _warn(self, message: str):
+        self.status_label.setText(message)
+        self._status_timer.start(_STATUS_TIMEOUT_MS)
+
+    def _prepend_queue_items(self, items: list):
+        self.queue_model.insertRows(0, len(items))
+        for row, text in enumerate(items):
+            self.queue_model.setData(self.queue_model.index(row), text)
+
+    def _request_size(self, key: tuple, waiter=None):
+        # Sizes the PDF identified by key on the thread pool. waiter, if given,
+        # is called with the size (or None) once it is known.
+        if waiter is None and self._size_waiter is not None:
+            return  # a print is waiting on its own file; don't displace it
+        self._size_waiter = waiter
+        if self._pending_size_key == key:
+            return
+        self._pending_size_key = key
+        worker = _SizeWorker(key)
+        worker.signals.finished.connect(self._on_size_analyzed)
+        QThreadPool.globalInstance().start(worker)
+
+    def _on_size_analyzed(self, key: tuple, result: Optional[tuple], error: Optional[str]):
+        if key != self._pending_size_key:
+            return  # superseded by a newer request
+        self._pending_size_key = None
+        waiter, self._size_waiter = self._size_waiter, None
+        if result is None:
+            log.warning("PDF 尺寸分析错误: %s", error)
+            self._analyzed_key = None
+            self.is_landscape = False
+            size = None
+        else:
+            size, is_landscape = result
+            # Reprints of the same label leave the config untouched. Sizes read
+            # back from JSON are lists, hence the tuple() before comparing.
+            prev = self.config['last_sizes'].get(self.printer_name)
+            if prev is None or tuple(prev) != size:
+                self.config['last_sizes'][self.printer_name] = size
             self.current_pdf_size = size
             self.is_landscape = is_landscape
-            doc.close()
-            return size
-        except Exception as e:
-            print(f"PDF 尺寸分析错误: {str(e)}")
-            return None
+            self._analyzed_key = key
+        if waiter is not None:
+            waiter(size)
 
     def _load_common_files(self):
-        common_files_folder = Path(self.manager.other_folder) # Use configured path
-        if common_files_folder.exists():
-            for file in common_files_folder.glob("*.pdf"):
-                self.common_files_list.addItem(file.name)
-                print(f"Added common file: {file.name}")  # 调试输出
-        else:
-            print(f"Folder {common_files_folder} does not exist")  # 调试输出
+        common_files_folder = self._other_folder # Use configured path
+        try:
+            # DirEntry carries the name and type from the directory listing,
+            # so no per-file stat or Path object is needed.
+            with os.scandir(common_files_folder) as entries:
+                names = [entry.name for entry in entries
+                         if _is_pdf(entry.name) and entry.is_file()]
+        except OSError:
+            log.debug("Folder %s does not exist", common_files_folder)  # 调试输出
+            return
+        self.common_files_model.setStringList(sorted(names))
 
-    def _print_common_file(self, item):
-        file_name = item.text()
-        folder_path = Path(self.manager.other_folder) # Use configured path
-        full_path = os.path.join(folder_path, file_name)
-        if os.path.exists(full_path):
+    def _print_common_file(self, index):
+        file_name = index.data()
+        full_path = os.path.join(self._other_folder, file_name) # Use configured path
+        if _stat_regular_file(full_path):
             self.file_path.setText(full_path)
             # The self.copies_spinbox already contains the desired quantity.
             # No need to set it to 1 anymore.
@@ -0,0 +1,197 @@
+import csv
+import os
+import time
+
+import pytest
+
+import print_logger
+
+
+@pytest.fixture(autouse=True)
+def log_dir(tmp_path, monkeypatch):
+    """Runs each test against a fresh print_log.csv in its own directory."""
+    print_logger._close_log_fh()
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(print_logger, "_log_buf", [])
+    monkeypatch.setattr(print_logger, "_header_written", None)
+    monkeypatch.setattr(print_logger, "_tombstone_count", 0)
+    monkeypatch.setattr(print_logger, "_offset_index", None)
+    monkeypatch.setattr(print_logger, "_own_write_state", None)
+    print_logger._invalidate_log_cache()
+    yield tmp_path
+    print_logger._close_log_fh()
+    print_logger._invalidate_log_cache()
+
+
+def _row(n, status="Printed"):
+    return (f"2024-01-01 00:00:{n:02d}", f"SKU{n}.pdf", n, "Printer_1", status)
+
+
+def _as_records(rows):
+    return [[str(value) for value in row] for row in rows]
+
+
+def _parse_file():
+    """Reads the log the slow, obvious way, for comparison."""
+    with open(print_logger.get_log_file_path(), newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        return [row for row in reader if row and not row[0].startswith(print_logger.TOMBSTONE)]
+
+
+def test_read_after_append():
+    print_logger.log_print_jobs([_row(1), _row(2)])
+    assert print_logger.read_print_log() == _as_records([_row(1), _row(2)])
+
+    print_logger.log_print_job(*_row(3))
+    assert print_logger.read_print_log() == _as_records([_row(1), _row(2), _row(3)])
+    assert print_logger.read_print_log() == _parse_file()
+
+
+def test_read_after_delete():
+    print_logger.log_print_jobs([_row(1), _row(2), _row(3)])
+    print_logger.read_print_log()
+
+    assert print_logger.delete_print_log_entry(_row(2)[0])
+    assert print_logger.read_print_log() == _as_records([_row(1), _row(3)])
+
+    print_logger.log_print_job(*_row(4))
+    assert print_logger.read_print_log() == _as_records([_row(1), _row(3), _row(4)])
+    assert not print_logger.delete_print_log_entry(_row(2)[0])
+
+
+def _raw_lines():
+    with open(print_logger.get_log_file_path(), "rb") as f:
+        return f.read().splitlines()
+
+
+def test_tombstones_from_earlier_runs_count_towards_compaction(monkeypatch):
+    print_logger.log_print_jobs([_row(n) for n in range(1, 6)])
+    print_logger.read_print_log()
+    # Stands in for deletes made by an earlier run.
+    with open(print_logger.get_log_file_path(), "r+b") as f:
+        lines = f.readlines()
+        f.seek(0)
+        f.write(b"".join(b"#" + line[1:] if i in (1, 2, 3) else line
+                         for i, line in enumerate(lines)))
+    monkeypatch.setattr(print_logger, "_tombstone_count", 0)
+    monkeypatch.setattr(print_logger, "_offset_index", None)
+    monkeypatch.setattr(print_logger, "COMPACT_AFTER_DELETES", 4)
+
+    assert print_logger.delete_print_log_entry(_row(4)[0])
+    assert not any(line.startswith(b"#") for line in _raw_lines())
+    assert print_logger.read_print_log() == _as_records([_row(5)])
+
+
+def test_tombstones_are_compacted_at_exit():
+    print_logger.log_print_jobs([_row(1), _row(2)])
+    assert print_logger.delete_print_log_entry(_row(1)[0])
+    assert any(line.startswith(b"#") for line in _raw_lines())
+
+    print_logger._close_log_at_exit()
+    assert not any(line.startswith(b"#") for line in _raw_lines())
+    assert print_logger.read_print_log() == _as_records([_row(2)])
+
+
+def test_read_after_clear():
+    print_logger.log_print_jobs([_row(1), _row(2)])
+    print_logger.read_print_log()
+
+    assert print_logger.clear_all_print_logs()
+    assert print_logger.read_print_log() == []
+
+    print_logger.log_print_job(*_row(3))
+    assert print_logger.read_print_log() == _as_records([_row(3)])
+    assert print_logger.read_print_log() == _parse_file()
+
+
+def test_read_after_external_edit():
+    print_logger.log_print_jobs([_row(1), _row(2)])
+    print_logger.read_print_log()
+    # Our own append leaves the cache extendable.
+    print_logger.log_print_job(*_row(3))
+    print_logger.flush_print_log()
+
+    # Another program rewrites the earlier rows and appends one of its own,
+    # growing the file past the cached size.
+    path = print_logger.get_log_file_path()
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(print_logger.LOG_HEADER)
+        writer.writerows([_row(1, "Edited by hand"), _row(2), _row(3), _row(4)])
+    assert print_logger.log_changed_externally()
+
+    expected = _as_records([_row(1, "Edited by hand"), _row(2), _row(3), _row(4)])
+    assert print_logger.read_print_log() == expected
+
+    # Appending after the external edit must not reuse the stale cache either.
+    print_logger.log_print_job(*_row(5))
+    assert print_logger.read_print_log() == expected + _as_records([_row(5)])
+    assert print_logger.read_print_log() == _parse_file()
+
+
+def test_line_separators_inside_fields():
+    rows = [_row(1), ("2024-01-01 00:00:02", "x\u2028y\x1cz\x85.pdf", 2, "Printer_1", "Printed"),
+            ("2024-01-01 00:00:03", "two\r\nlines.pdf", 3, "Printer_1", "Printed")]
+    print_logger.log_print_jobs(rows)
+    assert print_logger.read_print_log() == _as_records(rows) == _parse_file()
+
+    # The same rows again through the tail parser.
+    print_logger.log_print_jobs(rows)
+    print_logger.flush_print_log()
+    assert print_logger.read_print_log() == _as_records(rows + rows) == _parse_file()
+
+
+def test_own_writes_are_not_external():
+    print_logger.log_print_job(*_row(1))
+    print_logger.flush_print_log()
+    assert not print_logger.log_changed_externally()
+    assert os.path.isfile(print_logger.get_log_file_path())
+
+
+def test_buffered_rows_are_flushed_without_further_calls():
+    print_logger.log_print_job(*_row(1))
+    print_logger.flush_print_log()
+    # Logged right after a flush, so this row stays buffered at first.
+    print_logger.log_print_job(*_row(2))
+
+    deadline = time.monotonic() + print_logger.LOG_FLUSH_INTERVAL + 2
+    while len(_parse_file()) < 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert _parse_file() == _as_records([_row(1), _row(2)])
+
+
+_LOG_TEXT = (
+    "Timestamp,SKU/Filename,Quantity,Printer,Status\r\n"
+    "2024-01-01 00:00:01,SKU1.pdf,1,Printer_1,Printed\r\n"
+    "#024-01-01 00:00:02,SKU2.pdf,2,Printer_1,Printed\r\n"
+    "\r\n"
+    '2024-01-01 00:00:03,"标签, 大号.pdf",3,"Printer ""A""",Failed\r\n'
+    "2024-01-01 00:00:04,,4,Printer_2,\r\n"
+)
+
+
+@pytest.mark.skipif(print_logger.pd is None, reason="pandas is not installed")
+@pytest.mark.parametrize("text", [
+    _LOG_TEXT,
+    "Timestamp,SKU/Filename,Quantity,Printer,Status\r\n",
+    # Ragged rows: the csv module keeps them as they are.
+    _LOG_TEXT + "2024-01-01 00:00:05,SKU5.pdf,5,Printer_1,Printed,extra\r\n",
+    _LOG_TEXT + "2024-01-01 00:00:06,SKU6.pdf\r\n",
+    _LOG_TEXT + "2024-01-01 00:00:07,SKU7.pdf,7,,\r\n2024-01-01 00:00:08,SKU8.pdf,8\r\n",
+    _LOG_TEXT + "  \r\n",
+])
+def test_pandas_parser_matches_csv_parser(text, monkeypatch):
+    with open(print_logger.get_log_file_path(), "w", newline="", encoding="utf-8") as f:
+        f.write(text)
+    expected = print_logger._parse_log_with_csv(text)
+    parsed = print_logger._parse_log_with_pandas(text)
+    assert parsed is None or parsed == expected
+
+    monkeypatch.setattr(print_logger, "PANDAS_MIN_LOG_BYTES", 0)
+    assert print_logger.read_print_log() == expected == _parse_file()
+
+
+@pytest.mark.skipif(print_logger.pd is None, reason="pandas is not installed")
+def test_pandas_parser_handles_uniform_rows():
+    assert print_logger._parse_log_with_pandas(_LOG_TEXT) == print_logger._parse_log_with_csv(_LOG_TEXT)
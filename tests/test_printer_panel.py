@@ -0,0 +1,58 @@
+import pytest
+
+pytest.importorskip("win32print")
+pytest.importorskip("fitz")
+pytest.importorskip("PySide6")
+
+import printer_panel
+from printer_panel import _fast_mediabox
+
+
+def _pdf(tmp_path, body: bytes) -> str:
+    path = tmp_path / "label.pdf"
+    path.write_bytes(b"%PDF-1.4\n" + body + b"\n%%EOF\n")
+    return str(path)
+
+
+def test_single_mediabox(tmp_path):
+    path = _pdf(tmp_path, b"1 0 obj << /Type /Page /MediaBox [0 0 283 425] >> endobj")
+    assert _fast_mediabox(path) == (283.0, 425.0)
+
+
+def test_offset_mediabox(tmp_path):
+    path = _pdf(tmp_path, b"1 0 obj << /Type /Page /MediaBox [10 20 293.5 445] >> endobj")
+    assert _fast_mediabox(path) == (283.5, 425.0)
+
+
+@pytest.mark.parametrize("extra", [
+    b"/Rotate 90",
+    b"/CropBox [0 0 100 100]",
+    b"/MediaBox [0 0 100 100]",
+    b"/Type /ObjStm",
+])
+def test_ambiguous_files_fall_back(tmp_path, extra):
+    path = _pdf(tmp_path, b"1 0 obj << /Type /Page /MediaBox [0 0 283 425] " + extra + b" >> endobj")
+    assert _fast_mediabox(path) is None
+
+
+def test_rotate_zero_is_not_ambiguous(tmp_path):
+    path = _pdf(tmp_path, b"1 0 obj << /Type /Page /MediaBox [0 0 283 425] /Rotate 0 >> endobj")
+    assert _fast_mediabox(path) == (283.0, 425.0)
+
+
+def test_rotate_past_scanned_bytes(tmp_path):
+    # The /Pages node carries the MediaBox; the page's /Rotate only follows
+    # a stream longer than the scan window.
+    stream = b"x" * (printer_panel._MEDIABOX_SCAN_BYTES + 5000)
+    path = _pdf(tmp_path,
+                b"1 0 obj << /Type /Pages /Count 1 /Kids [3 0 R] /MediaBox [0 0 283 425] >> endobj\n"
+                b"2 0 obj << /Length %d >> stream\n" % len(stream) + stream + b"\nendstream endobj\n"
+                b"3 0 obj << /Type /Page /Parent 1 0 R /Rotate 90 /Contents 2 0 R >> endobj")
+    assert _fast_mediabox(path) is None
+
+
+def test_not_a_pdf(tmp_path):
+    path = tmp_path / "label.pdf"
+    path.write_bytes(b"<html>not found</html>")
+    with pytest.raises(ValueError):
+        _fast_mediabox(str(path))